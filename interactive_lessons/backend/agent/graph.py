@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Literal
 
 from langgraph.graph import END, START, StateGraph
@@ -23,11 +24,16 @@ def _route_after_plan(state: LessonState) -> Literal["retrieve_student_context",
     return "generate_content"
 
 
-def _route_after_content(state: LessonState) -> Literal["generate_figures", "assemble_html"]:
+# The HTML build doesn't depend on the review, so the two run side by side;
+# if the review fails, the next iteration rebuilds the HTML anyway
+_FINALIZE_NODES = ["assemble_html", "review_lesson"]
+
+
+def _route_after_content(state: LessonState) -> Literal["generate_figures"] | list[str]:
     plan = state.get("lesson_plan") or {}
     if plan.get("needs_figures") and plan.get("figure_requests"):
         return "generate_figures"
-    return "assemble_html"
+    return _FINALIZE_NODES
 
 
 def _route_after_review(state: LessonState) -> Literal["generate_content", "__end__"]:
@@ -38,7 +44,9 @@ def _route_after_review(state: LessonState) -> Literal["generate_content", "__en
     return "__end__"
 
 
+@lru_cache(maxsize=1)
 def build_graph() -> StateGraph:
+    """Build and compile the lesson graph once; the compiled graph is stateless and shared by all runs."""
     graph = StateGraph(LessonState)
 
     # Add nodes
@@ -70,14 +78,13 @@ def build_graph() -> StateGraph:
     graph.add_conditional_edges(
         "generate_content",
         _route_after_content,
-        {
-            "generate_figures": "generate_figures",
-            "assemble_html": "assemble_html",
-        },
+        ["generate_figures", *_FINALIZE_NODES],
     )
 
-    graph.add_edge("generate_figures", "assemble_html")
-    graph.add_edge("assemble_html", "review_lesson")
+    # Assemble and review in parallel
+    for node in _FINALIZE_NODES:
+        graph.add_edge("generate_figures", node)
+    graph.add_edge("assemble_html", END)
 
     # After review: loop or end
     graph.add_conditional_edges(
@@ -1,28 +1,84 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import operator
+import re
 import time
 import uuid
 from typing import Any
 
-from langchain_core.messages import HumanMessage, SystemMessage
+import orjson
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.runnables import RunnableConfig
 
 from backend.agent.prompts import (
+    GENERATE_CONTENT_PROMPT,
     GENERATE_CONTENT_SYSTEM,
     GENERATE_FIGURES_SYSTEM,
     PARSE_INPUT_SYSTEM,
+    PLAN_LESSON_PROMPT,
     PLAN_LESSON_SYSTEM,
+    REVIEW_LESSON_PROMPT,
     REVIEW_LESSON_SYSTEM,
 )
 from backend.agent.state import (
+    FigureRequest,
     GeneratedFigure,
     LessonPlan,
     LessonPlanSchema,
     LessonSection,
     LessonState,
+    MermaidFigureSchema,
+    PlotlyFigureSchema,
     ReviewResult,
 )
 from backend.config import get_settings
+from backend.utils import response_cache
+
+
+# ```lang ... ``` blocks; an unterminated fence runs to the end of the text
+_CODE_FENCE_RE = re.compile(r"```(?:([\w-]+)?[ \t]*\n)?(.*?)(?:```|\Z)", re.DOTALL)
+
+# <section data-title="..." data-type="..."> blocks emitted by generate_content
+_SECTION_RE = re.compile(
+    r'<section[^>]*data-title="([^"]*)"[^>]*data-type="([^"]*)"[^>]*>(.*?)</section>',
+    re.DOTALL | re.IGNORECASE,
+)
+
+
+def _strip_code_fence(text: str, lang: str) -> str:
+    """Return the body of the first ```lang fence, else of the first fence, else text."""
+    # The expected tag is matched literally, with or without whitespace or a
+    # newline after it (```json{...}``` is common in model output)
+    marker = f"```{lang}"
+    if marker in text:
+        return text.split(marker, 1)[1].split("```", 1)[0].strip()
+    match = _CODE_FENCE_RE.search(text)
+    return match.group(2).strip() if match else text
+
+
+def _extract_json_block(text: str) -> str:
+    """Return the JSON object in an LLM response, fenced or wrapped in prose."""
+    if "```" in text:
+        return _strip_code_fence(text, "json")
+    start, end = text.find("{"), text.rfind("}")
+    return text[start:end + 1] if 0 <= start < end else text
+
+
+def _cached_prefix_message(prefix: str, suffix: str = "") -> HumanMessage:
+    """
+    Human message whose ``prefix`` ends in a prompt-cache breakpoint on
+    Anthropic, so the system prompt plus ``prefix`` can be reused by later
+    calls that share them. Other providers get the plain concatenated string.
+    """
+    if get_settings().llm_provider != "anthropic":
+        return HumanMessage(content=prefix + suffix)
+    blocks = [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+    if suffix:
+        blocks.append({"type": "text", "text": suffix})
+    return HumanMessage(content=blocks)
 
 
 # ── parse_input ───────────────────────────────────────────────────────────────
@@ -49,11 +105,7 @@ async def parse_input(state: LessonState) -> dict:
     text = response.content
     try:
         # Try to parse JSON from response
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0].strip()
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0].strip()
-        parsed = json.loads(text)
+        parsed = orjson.loads(_extract_json_block(text))
         topic = parsed.get("topic", raw[:50])
         extracted_text = parsed.get("extracted_text", raw)
     except Exception:
@@ -70,53 +122,64 @@ async def parse_input(state: LessonState) -> dict:
 
 # ── plan_lesson ───────────────────────────────────────────────────────────────
 
+# Built once: the format instructions are input-independent, and they go in
+# the cacheable system prefix rather than after the per-topic content
+_PLAN_PARSER = PydanticOutputParser(pydantic_object=LessonPlanSchema)
+_PLAN_SYSTEM_PROMPT = f"{PLAN_LESSON_SYSTEM}\n\n{_PLAN_PARSER.get_format_instructions()}"
+
+_PLAN_SECTION_FIELDS = ("title", "content_type", "description")
+_plan_section_attrs = operator.attrgetter(*_PLAN_SECTION_FIELDS)
+
+
 async def plan_lesson(state: LessonState) -> dict:
     start = time.time()
     settings = get_settings()
     llm = settings.get_llm()
-    from langchain_core.output_parsers import PydanticOutputParser
-    parser = PydanticOutputParser(pydantic_object=LessonPlanSchema)
 
     student_hint = ""
     if state.get("student_id"):
         student_hint = f"\n\nStudent ID is provided ({state['student_id']}), so set needs_rag=true to personalize."
 
-    prompt = f"""Create a lesson plan for the following topic:
-
-Topic: {state['topic']}
-Content: {state['extracted_text'][:4000]}
-{student_hint}
-
-Generate a comprehensive lesson plan with 4-7 sections.
+    prompt = PLAN_LESSON_PROMPT.format(
+        topic=state["topic"],
+        content=state["extracted_text"][:4000],
+        student_hint=student_hint,
+    )
 
-{parser.get_format_instructions()}"""
+    cache_key = response_cache.make_key("plan_lesson", _PLAN_SYSTEM_PROMPT, prompt)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        response = AIMessage(content=cached)
+    else:
+        response = await llm.ainvoke([
+            SystemMessage(content=_PLAN_SYSTEM_PROMPT),
+            HumanMessage(content=prompt),
+        ])
+
+    # Parse the response once and keep the raw dict for the nested
+    # figure_requests fallback below; LangChain's more lenient parser is only
+    # needed when the JSON doesn't load or validate directly
+    try:
+        parsed_raw = orjson.loads(_extract_json_block(response.content))
+        result = LessonPlanSchema.model_validate(parsed_raw)
+    except Exception:
+        parsed_raw = {}
+        result = _PLAN_PARSER.invoke(response)
+    if cached is None:
+        await response_cache.put(cache_key, response.content)
 
-    response = await llm.ainvoke([
-        SystemMessage(content=PLAN_LESSON_SYSTEM),
-        HumanMessage(content=prompt),
-    ])
-    
-    result: LessonPlanSchema = parser.invoke(response)
+    # Extract figure requests from root, or fallback to checking inside sections if Cohere nested them.
+    # Nested ones are already plain dicts, so they are validated and kept as-is rather than dumped again
+    figure_requests = [fr.model_dump() for fr in result.figure_requests]
 
-    # Extract figure requests from root, or fallback to checking inside sections if Cohere nested them
-    raw_figure_requests = result.figure_requests
-    
-    import json as _json
-    if not raw_figure_requests:
+    if not figure_requests:
         try:
-            raw_json_str = response.content
-            if "```json" in raw_json_str:
-                 raw_json_str = raw_json_str.split("```json")[1].split("```")[0].strip()
-            elif "```" in raw_json_str:
-                 raw_json_str = raw_json_str.split("```")[1].split("```")[0].strip()
-                 
-            parsed_raw = _json.loads(raw_json_str)
-            if "sections" in parsed_raw:
-                for i, sec_data in enumerate(parsed_raw["sections"]):
-                    if "figure_requests" in sec_data:
-                        for fr in sec_data["figure_requests"]:
-                            fr["section_index"] = i
-                            raw_figure_requests.append(FigureRequest(**fr))
+            for i, sec_data in enumerate(parsed_raw.get("sections", [])):
+                if "figure_requests" in sec_data:
+                    for fr in sec_data["figure_requests"]:
+                        fr["section_index"] = i
+                        FigureRequest.model_validate(fr)
+                        figure_requests.append(fr)
         except Exception:
             pass
 
@@ -127,18 +190,12 @@ Generate a comprehensive lesson plan with 4-7 sections.
         "subject": result.subject,
         "learning_objectives": result.learning_objectives,
         "sections": [
-            {
-                "title": s.title,
-                "content_type": s.content_type,
-                "description": s.description,
-                "generated_content": "",
-                "figure_ids": [],
-            }
+            dict(zip(_PLAN_SECTION_FIELDS, _plan_section_attrs(s)), generated_content="", figure_ids=[])
             for s in result.sections
         ],
         "needs_rag": result.needs_rag,
         "needs_figures": result.needs_figures,
-        "figure_requests": [fr.model_dump() for fr in raw_figure_requests],
+        "figure_requests": figure_requests,
         "estimated_duration_minutes": result.estimated_duration_minutes,
     }
 
@@ -164,21 +221,17 @@ async def retrieve_student_context(state: LessonState) -> dict:
     grade = plan.get("grade_level", "")
     query = f"{state['topic']} {objectives[0] if objectives else ''} {grade}".strip()
 
-    try:
-        context_chunks = retrieve(student_id, query, top_k=5)
-        student_context = "\n\n".join(context_chunks)
-    except Exception:
-        student_context = ""
-
-    # Load student profile
-    import json as _json
-    from pathlib import Path
-    settings = get_settings()
-    profile_path = Path(settings.student_context_dir) / student_id / "profile.json"
-    student_profile = {}
-    if profile_path.exists():
-        with open(profile_path) as f:
-            student_profile = _json.load(f)
+    # The vector search and the profile read are independent blocking I/O, so
+    # run both in worker threads at once
+    chunks_result, profile_result = await asyncio.gather(
+        asyncio.to_thread(retrieve, student_id, query, top_k=5),
+        asyncio.to_thread(_load_student_profile, student_id),
+        return_exceptions=True,
+    )
+    student_context = "" if isinstance(chunks_result, BaseException) else "\n\n".join(chunks_result)
+    if isinstance(profile_result, BaseException):
+        raise profile_result
+    student_profile = profile_result
 
     return {
         "student_context": student_context,
@@ -188,9 +241,19 @@ async def retrieve_student_context(state: LessonState) -> dict:
     }
 
 
+def _load_student_profile(student_id: str) -> dict:
+    from pathlib import Path
+    settings = get_settings()
+    profile_path = Path(settings.student_context_dir) / student_id / "profile.json"
+    if not profile_path.exists():
+        return {}
+    with open(profile_path, "rb") as f:
+        return orjson.loads(f.read())
+
+
 # ── generate_content ──────────────────────────────────────────────────────────
 
-async def generate_content(state: LessonState) -> dict:
+async def generate_content(state: LessonState, config: RunnableConfig | None = None) -> dict:
     start = time.time()
     settings = get_settings()
     llm = settings.get_llm(streaming=True)
@@ -200,7 +263,9 @@ async def generate_content(state: LessonState) -> dict:
     review_result = state.get("review_result")
     iteration = state.get("iteration_count", 0)
 
-    # Build context for the LLM
+    # Build context for the LLM. The prompt is laid out so everything that is
+    # fixed for the lesson (plan, output format, student context) forms a stable
+    # prefix, and only the review feedback changes between review iterations.
     student_section = ""
     profile = state.get("student_profile", {})
     if profile or student_context:
@@ -236,63 +301,72 @@ Please fix these issues in your content.
         idx = fr.get("section_index", 0)
         figure_ids_by_section.setdefault(idx, []).append(f"figure_{idx}_{fr['type']}")
 
-    prompt = f"""Generate complete HTML content for this lesson.
-
-Lesson: {plan['title']}
-Subject: {plan['subject']}
-Grade Level: {plan['grade_level']}
-Duration: {plan['estimated_duration_minutes']} minutes
-
-Learning Objectives:
-{chr(10).join(f'- {obj}' for obj in plan['learning_objectives'])}
-
-Sections to generate:
-{sections_spec}
-
-{student_section}
-{review_section}
-
-For each section, output content wrapped in:
-<section data-title="EXACT_SECTION_TITLE" data-type="CONTENT_TYPE">
-... your HTML content ...
-</section>
-
-Generate all {len(plan['sections'])} sections with rich, educational HTML content."""
+    prompt = GENERATE_CONTENT_PROMPT.format(
+        title=plan["title"],
+        subject=plan["subject"],
+        grade_level=plan["grade_level"],
+        duration=plan["estimated_duration_minutes"],
+        objectives="\n".join(f"- {obj}" for obj in plan["learning_objectives"]),
+        sections_spec=sections_spec,
+        section_count=len(plan["sections"]),
+        student_section=student_section,
+    )
 
+    # Everything but the review feedback is fixed for the lesson, so review
+    # iterations can reuse it from the provider's prompt cache
     messages = [
         SystemMessage(content=GENERATE_CONTENT_SYSTEM),
-        HumanMessage(content=prompt),
+        _cached_prefix_message(prompt, review_section),
     ]
 
-    full_response = ""
+    # Sections are announced to the SSE stream as soon as their closing tag
+    # arrives; `pending` only holds the text after the last complete section
+    response_parts: list[str] = []
+    pending = ""
     async for chunk in llm.astream(messages):
         if hasattr(chunk, "content") and chunk.content:
-            full_response += chunk.content
+            response_parts.append(chunk.content)
+            pending += chunk.content
+            if ">" not in chunk.content:
+                continue
+            while match := _SECTION_RE.search(pending):
+                await _announce_section(match.group(1), match.group(3).strip(), config)
+                pending = pending[match.end():]
+    full_response = "".join(response_parts)
 
     # Parse sections from response
-    import re
-    section_pattern = re.compile(
-        r'<section[^>]*data-title="([^"]*)"[^>]*data-type="([^"]*)"[^>]*>(.*?)</section>',
-        re.DOTALL | re.IGNORECASE
-    )
-
     generated_sections: list[LessonSection] = []
-    matches = list(section_pattern.finditer(full_response))
-
-    if matches:
-        for i, match in enumerate(matches):
-            title = match.group(1)
-            content_type = match.group(2)
-            content = match.group(3).strip()
-            fig_ids = figure_ids_by_section.get(i, [])
-            generated_sections.append({
-                "title": title,
-                "content_type": content_type,
-                "description": "",
-                "generated_content": content,
-                "figure_ids": fig_ids,
-            })
-    else:
+    matches = list(_SECTION_RE.finditer(full_response))
+
+    for i, match in enumerate(matches):
+        title = match.group(1)
+        content_type = match.group(2)
+        content = match.group(3).strip()
+        fig_ids = figure_ids_by_section.get(i, [])
+        generated_sections.append({
+            "title": title,
+            "content_type": content_type,
+            "description": "",
+            "generated_content": content,
+            "figure_ids": fig_ids,
+        })
+
+    if len(generated_sections) < len(plan["sections"]):
+        # The model dropped or mangled some <section> blocks; regenerate only
+        # those, one call per section, concurrently. If no block parsed at all,
+        # the streamed response is discarded and every planned section costs
+        # one call; the single-blob fallback below only applies if those fail too.
+        generated_sections, regenerated = await _fill_missing_sections(
+            settings.get_llm(),
+            plan,
+            generated_sections,
+            figure_ids_by_section,
+            f"{student_section}{review_section}",
+        )
+        for section in regenerated:
+            await _announce_section(section["title"], section["generated_content"], config)
+
+    if not generated_sections:
         # Fallback: wrap all content in a single section
         generated_sections.append({
             "title": plan["title"],
@@ -302,7 +376,6 @@ Generate all {len(plan['sections'])} sections with rich, educational HTML conten
             "figure_ids": [],
         })
 
-    from langchain_core.messages import AIMessage
     return {
         "generated_sections": generated_sections,
         "messages": [AIMessage(content=full_response)],
@@ -312,6 +385,104 @@ Generate all {len(plan['sections'])} sections with rich, educational HTML conten
     }
 
 
+async def _announce_section(title: str, content: str, config: RunnableConfig | None) -> None:
+    """
+    Emit a section_generated event for the SSE stream. Events follow the order
+    sections are produced (streamed, then regenerated); generated_sections in
+    the node's result is the authoritative, plan-ordered list. No-op when the
+    node is called directly rather than as part of a graph run.
+    """
+    if config is None:
+        return
+    await adispatch_custom_event(
+        "section_generated",
+        {"type": "section_generated", "title": title, "content": content},
+        config=config,
+    )
+
+
+def _normalize_title(title: str) -> str:
+    return " ".join(title.split()).lower()
+
+
+async def _fill_missing_sections(
+    llm,
+    plan: dict,
+    sections: list[LessonSection],
+    figure_ids_by_section: dict[int, list[str]],
+    context: str,
+) -> tuple[list[LessonSection], list[LessonSection]]:
+    """
+    Return the planned sections in plan order, generating any that are missing
+    from ``sections``, along with the sections that were regenerated.
+    """
+    specs = plan["sections"]
+    index_by_title: dict[str, int] = {}
+    for i, spec in enumerate(specs):
+        index_by_title.setdefault(_normalize_title(spec["title"]), i)
+
+    # Place parsed sections by title first, then by their position for the
+    # ones whose title the model reworded
+    placed: dict[int, LessonSection] = {}
+    unmatched: list[tuple[int, LessonSection]] = []
+    for pos, section in enumerate(sections):
+        i = index_by_title.get(_normalize_title(section["title"]))
+        if i is not None and i not in placed:
+            placed[i] = section
+        else:
+            unmatched.append((pos, section))
+    for pos, section in unmatched:
+        free = [i for i in range(len(specs)) if i not in placed]
+        if not free:
+            break
+        placed[pos if pos in free else free[0]] = section
+
+    missing = [i for i in range(len(specs)) if i not in placed]
+    semaphore = asyncio.Semaphore(get_settings().section_concurrency)
+
+    async def _bounded(i: int) -> LessonSection:
+        async with semaphore:
+            return await _generate_section(llm, plan, i, context)
+
+    results = await asyncio.gather(*(_bounded(i) for i in missing), return_exceptions=True)
+    regenerated = {i: r for i, r in zip(missing, results) if not isinstance(r, BaseException)}
+    placed.update(regenerated)
+
+    filled = [
+        {**placed[i], "figure_ids": figure_ids_by_section.get(i, [])}
+        for i in range(len(specs))
+        if i in placed
+    ]
+    return filled, list(regenerated.values())
+
+
+async def _generate_section(llm, plan: dict, index: int, context: str) -> LessonSection:
+    spec = plan["sections"][index]
+    response = await llm.ainvoke([
+        SystemMessage(content=GENERATE_CONTENT_SYSTEM),
+        HumanMessage(content=f"""Generate the HTML content for one section of this lesson.
+
+Lesson: {plan['title']}
+Subject: {plan['subject']}
+Grade Level: {plan['grade_level']}
+
+Section {index + 1} of {len(plan['sections'])}: [{spec['content_type'].upper()}] {spec['title']}: {spec['description']}
+
+Output only the section's HTML content, without a surrounding <section> tag.
+{context}"""),
+    ])
+    content = response.content.strip()
+    if content.startswith("```"):
+        content = _strip_code_fence(content, "html")
+    return {
+        "title": spec["title"],
+        "content_type": spec["content_type"],
+        "description": "",
+        "generated_content": content,
+        "figure_ids": [],
+    }
+
+
 # ── generate_figures ──────────────────────────────────────────────────────────
 
 async def generate_figures(state: LessonState) -> dict:
@@ -325,8 +496,6 @@ async def generate_figures(state: LessonState) -> dict:
     if not figure_requests:
         return {"generated_figures": [], "current_node": "generate_figures"}
 
-    generated_figures: list[GeneratedFigure] = []
-
     try:
         from backend.mcp_servers.client import get_mcp_client_context
         ctx = await get_mcp_client_context()
@@ -337,74 +506,16 @@ async def generate_figures(state: LessonState) -> dict:
         tool_map = {}
         ctx = None
 
-    for i, fig_req in enumerate(figure_requests):
-        fig_type = fig_req.get("type", "mathjax")
-        description = fig_req.get("description", "")
-        section_index = fig_req.get("section_index", 0)
-        figure_id = str(uuid.uuid4())[:8]
+    # Figures are independent LLM round-trips, so run them concurrently,
+    # bounded to stay under provider rate limits.
+    semaphore = asyncio.Semaphore(settings.figure_concurrency)
 
-        try:
-            if fig_type == "plotly":
-                code = await _generate_plotly_code(llm, description, plan)
-                if "execute_plotly_code" in tool_map:
-                    result_str = await tool_map["execute_plotly_code"].ainvoke({"code": code})
-                    result = json.loads(result_str) if isinstance(result_str, str) else result_str
-                    if result.get("success"):
-                        generated_figures.append({
-                            "figure_id": figure_id,
-                            "figure_type": "plotly",
-                            "title": description[:60],
-                            "data": result["figure_json"],
-                            "section_index": section_index,
-                        })
-                        continue
-                    else:
-                        print(f"Plotly execution failed: {result.get('error')}", flush=True)
-                # Fallback: store code as-is
-                generated_figures.append({
-                    "figure_id": figure_id,
-                    "figure_type": "plotly",
-                    "title": description[:60],
-                    "data": _plotly_fallback(description),
-                    "section_index": section_index,
-                })
-
-            elif fig_type == "mermaid":
-                syntax = await _generate_mermaid_syntax(llm, description, plan)
-                if "execute_mermaid" in tool_map:
-                    result_str = await tool_map["execute_mermaid"].ainvoke({"mermaid_syntax": syntax})
-                    result = json.loads(result_str) if isinstance(result_str, str) else result_str
-                    if result.get("success"):
-                        syntax = result["mermaid_syntax"]
-                    else:
-                        print(f"Mermaid validation failed: {result.get('error')}", flush=True)
-                generated_figures.append({
-                    "figure_id": figure_id,
-                    "figure_type": "mermaid",
-                    "title": description[:60],
-                    "data": syntax,
-                    "section_index": section_index,
-                })
-
-            elif fig_type == "mathjax":
-                latex = await _generate_latex(llm, description, plan)
-                generated_figures.append({
-                    "figure_id": figure_id,
-                    "figure_type": "mathjax",
-                    "title": description[:60],
-                    "data": latex,
-                    "section_index": section_index,
-                })
-
-        except Exception as e:
-            # Don't fail the whole pipeline for a figure error
-            generated_figures.append({
-                "figure_id": figure_id,
-                "figure_type": fig_type,
-                "title": f"Figure: {description[:40]}",
-                "data": f"<!-- Figure generation failed: {e} -->",
-                "section_index": section_index,
-            })
+    async def _bounded(fig_req: dict) -> GeneratedFigure | None:
+        async with semaphore:
+            return await _generate_figure(llm, fig_req, plan, tool_map)
+
+    results = await asyncio.gather(*(_bounded(fr) for fr in figure_requests))
+    generated_figures: list[GeneratedFigure] = [fig for fig in results if fig is not None]
 
     if ctx is not None:
         try:
@@ -419,9 +530,96 @@ async def generate_figures(state: LessonState) -> dict:
     }
 
 
-async def _generate_plotly_code(llm, description: str, plan: dict) -> str:
-    from backend.agent.state import PlotlyFigureSchema
-    structured_llm = llm.with_structured_output(PlotlyFigureSchema)
+async def _generate_figure(llm, fig_req: dict, plan: dict, tool_map: dict) -> GeneratedFigure | None:
+    fig_type = fig_req.get("type", "mathjax")
+    description = fig_req.get("description", "")
+    section_index = fig_req.get("section_index", 0)
+    figure_id = str(uuid.uuid4())[:8]
+
+    try:
+        # Only figures that generated (and, where a tool exists, validated) cleanly
+        # are cached; fallbacks and errors are retried on the next run
+        cache_key = response_cache.make_key("figure", fig_type, description, plan["subject"], plan["grade_level"])
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            return {
+                "figure_id": figure_id,
+                "figure_type": fig_type,
+                "title": description[:60],
+                "data": cached,
+                "section_index": section_index,
+            }
+
+        if fig_type == "plotly":
+            code = await _generate_plotly_code(description, plan)
+            if "execute_plotly_code" in tool_map:
+                result_str = await tool_map["execute_plotly_code"].ainvoke({"code": code})
+                result = orjson.loads(result_str) if isinstance(result_str, str) else result_str
+                if result.get("success"):
+                    await response_cache.put(cache_key, result["figure_json"])
+                    return {
+                        "figure_id": figure_id,
+                        "figure_type": "plotly",
+                        "title": description[:60],
+                        "data": result["figure_json"],
+                        "section_index": section_index,
+                    }
+                else:
+                    print(f"Plotly execution failed: {result.get('error')}", flush=True)
+            # Fallback: store code as-is
+            return {
+                "figure_id": figure_id,
+                "figure_type": "plotly",
+                "title": description[:60],
+                "data": _plotly_fallback(description),
+                "section_index": section_index,
+            }
+
+        elif fig_type == "mermaid":
+            syntax = await _generate_mermaid_syntax(description, plan)
+            if "execute_mermaid" in tool_map:
+                result_str = await tool_map["execute_mermaid"].ainvoke({"mermaid_syntax": syntax})
+                result = orjson.loads(result_str) if isinstance(result_str, str) else result_str
+                if result.get("success"):
+                    syntax = result["mermaid_syntax"]
+                    await response_cache.put(cache_key, syntax)
+                else:
+                    print(f"Mermaid validation failed: {result.get('error')}", flush=True)
+            return {
+                "figure_id": figure_id,
+                "figure_type": "mermaid",
+                "title": description[:60],
+                "data": syntax,
+                "section_index": section_index,
+            }
+
+        elif fig_type == "mathjax":
+            latex = await _generate_latex(llm, description, plan)
+            if latex:
+                await response_cache.put(cache_key, latex)
+            return {
+                "figure_id": figure_id,
+                "figure_type": "mathjax",
+                "title": description[:60],
+                "data": latex,
+                "section_index": section_index,
+            }
+
+    except Exception as e:
+        # Don't fail the whole pipeline for a figure error
+        return {
+            "figure_id": figure_id,
+            "figure_type": fig_type,
+            "title": f"Figure: {description[:40]}",
+            "data": f"<!-- Figure generation failed: {e} -->",
+            "section_index": section_index,
+        }
+
+    return None
+
+
+async def _generate_plotly_code(description: str, plan: dict) -> str:
+    structured_llm = get_settings().get_structured_llm(PlotlyFigureSchema)
 
     response = await structured_llm.ainvoke([
         SystemMessage(content=GENERATE_FIGURES_SYSTEM),
@@ -441,17 +639,11 @@ Requirements:
     if not response:
         return ""
         
-    code = response.code.strip()
-    if "```python" in code:
-        code = code.split("```python")[1].split("```")[0].strip()
-    elif "```" in code:
-        code = code.split("```")[1].split("```")[0].strip()
-    return code
+    return _strip_code_fence(response.code.strip(), "python")
 
 
-async def _generate_mermaid_syntax(llm, description: str, plan: dict) -> str:
-    from backend.agent.state import MermaidFigureSchema
-    structured_llm = llm.with_structured_output(MermaidFigureSchema)
+async def _generate_mermaid_syntax(description: str, plan: dict) -> str:
+    structured_llm = get_settings().get_structured_llm(MermaidFigureSchema)
 
     response = await structured_llm.ainvoke([
         SystemMessage(content=GENERATE_FIGURES_SYSTEM),
@@ -471,12 +663,7 @@ Requirements:
     if not response:
         return ""
         
-    syntax = response.syntax.strip()
-    if "```mermaid" in syntax:
-        syntax = syntax.split("```mermaid")[1].split("```")[0].strip()
-    elif "```" in syntax:
-        syntax = syntax.split("```")[1].split("```")[0].strip()
-    return syntax
+    return _strip_code_fence(response.syntax.strip(), "mermaid")
 
 
 async def _generate_latex(llm, description: str, plan: dict) -> str:
@@ -499,11 +686,10 @@ Return ONLY the LaTeX string (without $$ delimiters), no explanations."""),
 
 def _plotly_fallback(description: str) -> str:
     """Minimal fallback plotly figure JSON."""
-    import json
-    return json.dumps({
+    return orjson.dumps({
         "data": [{"type": "scatter", "x": [1, 2, 3], "y": [1, 2, 3], "mode": "lines+markers"}],
         "layout": {"title": description[:60]},
-    })
+    }).decode()
 
 
 # ── assemble_html ─────────────────────────────────────────────────────────────
@@ -527,35 +713,29 @@ async def assemble_html(state: LessonState) -> dict:
 async def review_lesson(state: LessonState) -> dict:
     start = time.time()
     settings = get_settings()
-    llm = settings.get_llm()
-    structured_llm = llm.with_structured_output(ReviewResult)
+    structured_llm = settings.get_structured_llm(ReviewResult)
 
     plan = state.get("lesson_plan", {}) or {}
     sections = state.get("generated_sections", [])
     iteration = state.get("iteration_count", 0)
 
-    sections_summary = "\n".join(
-        f"Section {i+1}: {s['title']} ({len(s['generated_content'])} chars)"
-        for i, s in enumerate(sections)
-    )
-
-    prompt = f"""Review this generated lesson:
-
-Title: {plan.get('title', 'Unknown')}
-Subject: {plan.get('subject', 'Unknown')}
-Grade: {plan.get('grade_level', 'Unknown')}
-Iteration: {iteration}
-
-Planned sections: {len(plan.get('sections', []))}
-Generated sections: {len(sections)}
-
-Sections summary:
-{sections_summary}
-
-Sample content from first section:
-{sections[0]['generated_content'][:500] if sections else 'No content'}
+    sections_summary = "\n".join([
+        f"Section {i}: {s['title']} ({len(s['generated_content'])} chars)"
+        for i, s in enumerate(sections, 1)
+    ])
 
-Evaluate the lesson quality and determine if it should be published."""
+    # Lesson-level fields come before the ones that change per review
+    # iteration, so retries share the longest possible prefix
+    prompt = REVIEW_LESSON_PROMPT.format(
+        title=plan.get("title", "Unknown"),
+        subject=plan.get("subject", "Unknown"),
+        grade_level=plan.get("grade_level", "Unknown"),
+        planned_count=len(plan.get("sections", [])),
+        iteration=iteration,
+        generated_count=len(sections),
+        sections_summary=sections_summary,
+        sample=sections[0]["generated_content"][:500] if sections else "No content",
+    )
 
     result: ReviewResult = await structured_llm.ainvoke([
         SystemMessage(content=REVIEW_LESSON_SYSTEM),
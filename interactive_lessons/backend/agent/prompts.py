@@ -68,3 +68,53 @@ CRITICAL: The HTML content is provided directly in the prompt below. You DO NOT
 Return passed=true if the lesson is ready to publish (minor issues are acceptable).
 Return passed=false with specific issues list if significant problems need fixing.
 DO NOT provide any conversational preamble. Output ONLY the required JSON structure."""
+
+# ── Per-call prompt templates (filled with str.format) ────────────────────────
+# Fixed wording comes first and per-call values last, so repeated calls share
+# the longest possible prompt prefix.
+
+PLAN_LESSON_PROMPT = """Create a lesson plan for the following topic:
+
+Topic: {topic}
+Content: {content}
+{student_hint}
+
+Generate a comprehensive lesson plan with 4-7 sections."""
+
+GENERATE_CONTENT_PROMPT = """Generate complete HTML content for this lesson.
+
+Lesson: {title}
+Subject: {subject}
+Grade Level: {grade_level}
+Duration: {duration} minutes
+
+Learning Objectives:
+{objectives}
+
+Sections to generate:
+{sections_spec}
+
+For each section, output content wrapped in:
+<section data-title="EXACT_SECTION_TITLE" data-type="CONTENT_TYPE">
+... your HTML content ...
+</section>
+
+Generate all {section_count} sections with rich, educational HTML content.
+{student_section}
+"""
+
+REVIEW_LESSON_PROMPT = """Evaluate the quality of this generated lesson and determine if it should be published.
+
+Title: {title}
+Subject: {subject}
+Grade: {grade_level}
+Planned sections: {planned_count}
+
+Iteration: {iteration}
+Generated sections: {generated_count}
+
+Sections summary:
+{sections_summary}
+
+Sample content from first section:
+{sample}"""
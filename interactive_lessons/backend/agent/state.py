@@ -81,6 +81,10 @@ class GeneratedFigure(TypedDict):
     section_index: int
 
 
+def _last_value(_: str, new: str) -> str:
+    return new
+
+
 class LessonState(TypedDict):
     # Input
     lesson_id: str
@@ -114,6 +118,6 @@ class LessonState(TypedDict):
     iteration_count: int
 
     # Status
-    current_node: str
+    current_node: Annotated[str, _last_value]  # assemble_html and review_lesson write it in the same step
     error: Optional[str]
     completed: bool
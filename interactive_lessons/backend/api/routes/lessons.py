@@ -1,13 +1,13 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import time
 import uuid
 from pathlib import Path
 from typing import AsyncGenerator
 
 import aiofiles
+import orjson
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
 from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 
@@ -130,10 +130,11 @@ async def generate_from_pdf_upload(
     settings = get_settings()
     from backend.utils.pdf_parser import extract_text_from_upload
 
-    combined_text = ""
+    text_parts: list[str] = []
     for upload in files:
         text = await extract_text_from_upload(upload)
-        combined_text += f"\n\n--- {upload.filename} ---\n\n{text}"
+        text_parts.append(f"\n\n--- {upload.filename} ---\n\n{text}")
+    combined_text = "".join(text_parts)
 
     lesson_id = str(uuid.uuid4())
     get_queue(lesson_id)
@@ -144,6 +145,9 @@ async def generate_from_pdf_upload(
     )
 
 
+_HEARTBEAT = f"data: {orjson.dumps({'type': 'heartbeat'}).decode()}\n\n"
+
+
 async def _sse_generator(lesson_id: str) -> AsyncGenerator[str, None]:
     queue = get_queue(lesson_id)
     heartbeat_interval = 15  # seconds
@@ -152,13 +156,13 @@ async def _sse_generator(lesson_id: str) -> AsyncGenerator[str, None]:
         try:
             event = await asyncio.wait_for(queue.get(), timeout=heartbeat_interval)
         except asyncio.TimeoutError:
-            yield f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
+            yield _HEARTBEAT
             continue
 
         if event is None:
             break
 
-        yield f"data: {json.dumps(event)}\n\n"
+        yield f"data: {orjson.dumps(event).decode()}\n\n"
 
 
 @router.get("/{lesson_id}/stream")
@@ -181,7 +185,7 @@ async def list_lessons():
     results = []
     for meta_file in sorted(lessons_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
         async with aiofiles.open(meta_file) as f:
-            data = json.loads(await f.read())
+            data = orjson.loads(await f.read())
         results.append(LessonMetadata(**data))
     return results
 
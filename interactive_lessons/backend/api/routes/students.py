@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import uuid
 from datetime import datetime, timezone
@@ -76,7 +77,7 @@ async def upload_student_context(student_id: str, files: list[UploadFile]):
     from backend.utils.pdf_parser import extract_text_from_upload
 
     processed = []
-    all_chunks = []
+    texts = []
 
     for upload in files:
         save_path = student_dir / upload.filename
@@ -85,10 +86,12 @@ async def upload_student_context(student_id: str, files: list[UploadFile]):
             await f.write(content)
 
         text = await extract_text_from_upload(upload, content=content)
-        chunks = index_files(student_id, [(upload.filename, text)])
-        all_chunks.extend(chunks)
+        texts.append((upload.filename, text))
         processed.append(upload.filename)
 
+    # One indexing pass for all files; embedding is CPU-bound, so keep it off the event loop
+    all_chunks = await asyncio.to_thread(index_files, student_id, texts)
+
     # Update profile context_files
     existing = set(profile.get("context_files", []))
     existing.update(processed)
@@ -114,10 +117,8 @@ async def delete_student(student_id: str):
 
     # Remove ChromaDB collection
     try:
-        import chromadb
-        client = chromadb.PersistentClient(path=settings.chroma_db_path)
-        collection_name = f"student_{student_id.replace('-', '_')}"
-        client.delete_collection(collection_name)
+        from backend.rag.store import collection_name, get_chroma_client
+        get_chroma_client().delete_collection(collection_name(student_id))
     except Exception:
         pass
 
@@ -58,7 +58,7 @@ class StudentContextUploadResponse(BaseModel):
 # ── SSE event schemas (for documentation only – sent as raw JSON strings) ─────
 
 class SSEEvent(BaseModel):
-    type: str  # node_start | token | node_end | figure_generated | complete | error | heartbeat
+    type: str  # node_start | token | node_end | section_generated | figure_generated | complete | error | heartbeat
     node: Optional[str] = None
     content: Optional[str] = None
     took_ms: Optional[int] = None
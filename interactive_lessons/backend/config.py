@@ -3,6 +3,7 @@ from __future__ import annotations
 from functools import lru_cache
 from pathlib import Path
 
+from pydantic import PrivateAttr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -13,6 +14,11 @@ class Settings(BaseSettings):
     llm_provider: str = "anthropic"
     llm_model: str = "claude-sonnet-4-6"
     llm_temperature: float = 0.7
+    figure_concurrency: int = 5  # max figure LLM calls in flight per lesson
+    section_concurrency: int = 5  # max section-regeneration LLM calls in flight per lesson
+    # openai provider only: request structured output via response_format
+    # json_schema with strict=True, so the server constrains decoding to the schema
+    openai_strict_json_schema: bool = False
 
     # API Keys
     anthropic_api_key: str = ""
@@ -32,10 +38,20 @@ class Settings(BaseSettings):
     student_context_dir: str = "./data/student_context"
     mcp_server_path: str = "./backend/mcp_servers/python_executor.py"
 
+    # Cache plan and figure LLM responses under data_dir/llm_cache.
+    # Off by default: a hit replays the same output for a repeated topic.
+    response_cache_enabled: bool = False
+    response_cache_ttl_seconds: int = 86400
+    response_cache_max_entries: int = 1000
+
     # App
     app_host: str = "0.0.0.0"
     app_port: int = 8000
 
+    # Chat model instances keyed by factory arguments. Reusing them across nodes
+    # and requests keeps each provider client's HTTP connection pool warm.
+    _llm_cache: dict = PrivateAttr(default_factory=dict)
+
     def ensure_dirs(self) -> None:
         for path in [self.data_dir, self.chroma_db_path, self.lessons_dir, self.student_context_dir]:
             Path(path).mkdir(parents=True, exist_ok=True)
@@ -61,7 +77,30 @@ class Settings(BaseSettings):
             **({"base_url": self.openai_api_base} if self.openai_api_base else {}),
         )
 
+    def _cached_llm(self, key: tuple, factory):
+        llm = self._llm_cache.get(key)
+        if llm is None:
+            llm = self._llm_cache[key] = factory()
+        return llm
+
     def get_llm(self, streaming: bool = False):
+        return self._cached_llm(("llm", streaming), lambda: self._build_llm(streaming))
+
+    def get_small_llm(self, streaming: bool = False):
+        """Lighter model for parse_input node."""
+        return self._cached_llm(("small_llm", streaming), lambda: self._build_small_llm(streaming))
+
+    def get_structured_llm(self, schema: type):
+        """Main model bound to a structured-output schema, built once per schema."""
+        kwargs = {}
+        if self.llm_provider == "openai" and self.openai_strict_json_schema:
+            kwargs = {"method": "json_schema", "strict": True}
+        return self._cached_llm(
+            ("structured", schema),
+            lambda: self.get_llm().with_structured_output(schema, **kwargs),
+        )
+
+    def _build_llm(self, streaming: bool = False):
         if self.llm_provider == "ollama":
             from langchain_ollama import ChatOllama
             return ChatOllama(model=self.llm_model, base_url=self.ollama_base_url)
@@ -79,8 +118,7 @@ class Settings(BaseSettings):
             streaming=streaming,
         )
 
-    def get_small_llm(self, streaming: bool = False):
-        """Lighter model for parse_input node."""
+    def _build_small_llm(self, streaming: bool = False):
         if self.llm_provider == "ollama":
             from langchain_ollama import ChatOllama
             return ChatOllama(model=self.llm_model, base_url=self.ollama_base_url)
@@ -14,6 +14,8 @@ import sys
 import traceback
 from typing import Any
 
+import orjson
+
 # FastMCP for clean tool definition
 try:
     from mcp.server.fastmcp import FastMCP
@@ -36,6 +38,25 @@ _MERMAID_KEYWORDS = [
     "flowchart", "graph", "sequenceDiagram", "classDiagram", "stateDiagram",
     "erDiagram", "gantt", "pie", "gitGraph", "mindmap", "timeline", "xychart-beta",
 ]
+# Lowercased once so validation is a single str.startswith(tuple) call
+_MERMAID_PREFIXES = tuple(kw.lower() for kw in _MERMAID_KEYWORDS)
+
+
+def _to_json(payload: dict) -> str:
+    return orjson.dumps(payload).decode()
+
+
+def _figure_to_json(fig: Any) -> str:
+    # orjson serializes numpy arrays natively; pio.to_json handles anything it can't
+    import plotly.io as pio
+
+    try:
+        return orjson.dumps(
+            fig.to_plotly_json(),
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        ).decode()
+    except TypeError:
+        return pio.to_json(fig)
 
 
 @mcp.tool()
@@ -48,7 +69,6 @@ def execute_plotly_code(code: str) -> str:
     try:
         import numpy as np
         import plotly.graph_objects as go
-        import plotly.io as pio
 
         namespace: dict[str, Any] = {
             "go": go,
@@ -61,16 +81,16 @@ def execute_plotly_code(code: str) -> str:
 
         fig = namespace.get("fig")
         if fig is None:
-            return json.dumps({"success": False, "error": "Code did not assign a 'fig' variable"})
+            return _to_json({"success": False, "error": "Code did not assign a 'fig' variable"})
 
         if not isinstance(fig, go.Figure):
-            return json.dumps({"success": False, "error": f"'fig' is not a plotly Figure, got {type(fig).__name__}"})
+            return _to_json({"success": False, "error": f"'fig' is not a plotly Figure, got {type(fig).__name__}"})
 
-        figure_json = pio.to_json(fig)
-        return json.dumps({"success": True, "figure_json": figure_json})
+        figure_json = _figure_to_json(fig)
+        return _to_json({"success": True, "figure_json": figure_json})
 
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e), "traceback": traceback.format_exc()})
+        return _to_json({"success": False, "error": str(e), "traceback": traceback.format_exc()})
 
 
 @mcp.tool()
@@ -83,17 +103,17 @@ def execute_mermaid(mermaid_syntax: str) -> str:
     cleaned = mermaid_syntax.strip()
 
     # Check if starts with a known Mermaid diagram keyword
-    first_line = cleaned.split("\n")[0].strip().lower()
-    is_valid = any(first_line.startswith(kw.lower()) for kw in _MERMAID_KEYWORDS)
+    first_line = cleaned.partition("\n")[0].strip().lower()
+    is_valid = first_line.startswith(_MERMAID_PREFIXES)
 
     if not is_valid:
-        return json.dumps({
+        return _to_json({
             "success": False,
             "error": f"Mermaid syntax must start with a diagram type keyword. Got: '{first_line}'. "
                      f"Valid keywords: {', '.join(_MERMAID_KEYWORDS)}",
         })
 
-    return json.dumps({"success": True, "mermaid_syntax": cleaned})
+    return _to_json({"success": True, "mermaid_syntax": cleaned})
 
 
 @mcp.tool()
@@ -114,7 +134,7 @@ def generate_mathjax_equation(latex: str, display_mode: bool = True) -> str:
     else:
         html_snippet = f'<span class="mathjax-inline">${clean_latex}$</span>'
 
-    return json.dumps({"success": True, "html_snippet": html_snippet, "latex": clean_latex})
+    return _to_json({"success": True, "html_snippet": html_snippet, "latex": clean_latex})
 
 
 if __name__ == "__main__":
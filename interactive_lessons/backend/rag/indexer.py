@@ -3,7 +3,7 @@ from __future__ import annotations
 import re
 from pathlib import Path
 
-from backend.config import get_settings
+from backend.rag.store import collection_name, get_chroma_client, get_embedding_function
 
 CHUNK_SIZE = 800
 CHUNK_OVERLAP = 100
@@ -24,22 +24,10 @@ def _chunk_text(text: str) -> list[str]:
 
 def _get_collection(student_id: str):
     """Get or create a ChromaDB collection for this student."""
-    import chromadb
-    from chromadb.utils import embedding_functions
-
-    settings = get_settings()
-    client = chromadb.PersistentClient(path=settings.chroma_db_path)
-
-    # ChromaDB collection names: alphanumeric + underscores, no hyphens
-    collection_name = f"student_{re.sub(r'[^a-zA-Z0-9_]', '_', student_id)}"
-
-    ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"
-    )
-
+    client = get_chroma_client()
     return client.get_or_create_collection(
-        name=collection_name,
-        embedding_function=ef,
+        name=collection_name(student_id),
+        embedding_function=get_embedding_function(),
         metadata={"student_id": student_id},
     )
 
@@ -56,30 +44,33 @@ def index_files(student_id: str, files: list[tuple[str, str]]) -> list[str]:
         List of chunk IDs indexed
     """
     collection = _get_collection(student_id)
-    all_ids = []
+    # chunk id -> (document, metadata). Chunks from every file are collected so
+    # they are embedded and written in as few upserts as Chroma allows; keying
+    # by id keeps the last file when two uploads map to the same ids, as the
+    # per-file upserts did.
+    chunks: dict[str, tuple[str, dict]] = {}
 
     for filename, text in files:
         if not text.strip():
             continue
 
-        chunks = _chunk_text(text)
-        ids = []
-        documents = []
-        metadatas = []
-
-        for i, chunk in enumerate(chunks):
-            chunk_id = f"{student_id}_{re.sub(r'[^a-zA-Z0-9]', '_', filename)}_{i}"
-            ids.append(chunk_id)
-            documents.append(chunk)
-            metadatas.append({
+        id_prefix = f"{student_id}_{re.sub(r'[^a-zA-Z0-9]', '_', filename)}"
+        for i, chunk in enumerate(_chunk_text(text)):
+            chunks[f"{id_prefix}_{i}"] = (chunk, {
                 "source_file": filename,
                 "chunk_index": i,
                 "student_id": student_id,
             })
 
-        if ids:
-            # Upsert to handle re-indexing
-            collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
-            all_ids.extend(ids)
-
-    return all_ids
+    ids = list(chunks)
+    batch_size = get_chroma_client().get_max_batch_size()
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        # Upsert to handle re-indexing
+        collection.upsert(
+            ids=batch_ids,
+            documents=[chunks[cid][0] for cid in batch_ids],
+            metadatas=[chunks[cid][1] for cid in batch_ids],
+        )
+
+    return ids
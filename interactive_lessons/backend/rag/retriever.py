@@ -1,8 +1,6 @@
 from __future__ import annotations
 
-import re
-
-from backend.config import get_settings
+from backend.rag.store import collection_name, get_chroma_client, get_embedding_function
 
 
 def retrieve(student_id: str, query: str, top_k: int = 5) -> list[str]:
@@ -17,19 +15,11 @@ def retrieve(student_id: str, query: str, top_k: int = 5) -> list[str]:
     Returns:
         List of text chunks, most relevant first
     """
-    import chromadb
-    from chromadb.utils import embedding_functions
-
-    settings = get_settings()
-    client = chromadb.PersistentClient(path=settings.chroma_db_path)
-
-    collection_name = f"student_{re.sub(r'[^a-zA-Z0-9_]', '_', student_id)}"
-
     try:
-        ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
+        collection = get_chroma_client().get_collection(
+            name=collection_name(student_id),
+            embedding_function=get_embedding_function(),
         )
-        collection = client.get_collection(name=collection_name, embedding_function=ef)
     except Exception:
         return []
 
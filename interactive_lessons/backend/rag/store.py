@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+from backend.config import get_settings
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+@lru_cache(maxsize=1)
+def get_chroma_client():
+    """Process-wide ChromaDB client, opened once and reused by every request."""
+    import chromadb
+
+    settings = get_settings()
+    return chromadb.PersistentClient(path=settings.chroma_db_path)
+
+
+@lru_cache(maxsize=1)
+def get_embedding_function():
+    """Sentence-transformer embedding function; the model is loaded from disk only once."""
+    from chromadb.utils import embedding_functions
+
+    return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL)
+
+
+def collection_name(student_id: str) -> str:
+    # ChromaDB collection names: alphanumeric + underscores, no hyphens
+    return f"student_{re.sub(r'[^a-zA-Z0-9_]', '_', student_id)}"
@@ -1,23 +1,27 @@
 from __future__ import annotations
 
+import asyncio
 import json
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 
 import aiofiles
-import json as _json
+import orjson
 
 from jinja2 import Environment, FileSystemLoader
 
 from backend.config import get_settings
 
 
+@lru_cache(maxsize=1)
 def _get_jinja_env() -> Environment:
+    # Shared so the compiled lesson template is cached across lessons
     templates_dir = Path(__file__).parent.parent.parent / "templates"
     env = Environment(loader=FileSystemLoader(str(templates_dir)), autoescape=False)
     # Add tojson filter (Jinja2 has it built-in since 2.9, but ensure it's available)
     if "tojson" not in env.filters:
-        env.filters["tojson"] = lambda v, **kw: _json.dumps(v, **kw)
+        env.filters["tojson"] = lambda v, **kw: json.dumps(v, **kw)
     return env
 
 
@@ -51,8 +55,10 @@ async def build_and_save_lesson(state: dict) -> Path:
     template = env.get_template("lesson.html.j2")
 
     student_name = student_profile.get("name", "Student") if student_profile else "Student"
+    # One timestamp for both the page and its metadata
+    now = datetime.now(timezone.utc)
 
-    html_content = template.render(
+    stream = template.stream(
         lesson_id=lesson_id,
         title=plan.get("title", "Lesson"),
         subject=plan.get("subject", ""),
@@ -62,13 +68,13 @@ async def build_and_save_lesson(state: dict) -> Path:
         sections=enriched_sections,
         all_figures=figures,
         student_name=student_name,
-        generated_at=datetime.now(timezone.utc).strftime("%B %d, %Y"),
+        generated_at=now.strftime("%B %d, %Y"),
     )
 
-    # Write HTML
+    # Write HTML: the template is rendered straight into the file in a worker
+    # thread, so the full page is never held in memory or rendered on the event loop
     html_path = lessons_dir / f"{lesson_id}.html"
-    async with aiofiles.open(html_path, "w", encoding="utf-8") as f:
-        await f.write(html_content)
+    await asyncio.to_thread(stream.dump, str(html_path), "utf-8")
 
     # Write metadata JSON
     meta = {
@@ -79,11 +85,11 @@ async def build_and_save_lesson(state: dict) -> Path:
         "grade_level": plan.get("grade_level", ""),
         "subject": plan.get("subject", ""),
         "duration_minutes": plan.get("estimated_duration_minutes", 30),
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": now.isoformat(),
         "html_url": f"/lessons/{lesson_id}.html",
     }
     meta_path = lessons_dir / f"{lesson_id}.json"
     async with aiofiles.open(meta_path, "w", encoding="utf-8") as f:
-        await f.write(json.dumps(meta, indent=2))
+        await f.write(orjson.dumps(meta, option=orjson.OPT_INDENT_2).decode())
 
     return html_path
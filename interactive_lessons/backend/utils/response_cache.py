@@ -0,0 +1,86 @@
+"""
+On-disk cache for LLM responses of idempotent lesson steps (plans, figures).
+
+Entries are small JSON files under ``<data_dir>/llm_cache``, named by a SHA-256
+of the provider, model and the caller-supplied key parts, so any change to the
+inputs is a miss. Entries expire after RESPONSE_CACHE_TTL_SECONDS and the oldest
+are evicted beyond RESPONSE_CACHE_MAX_ENTRIES. Off unless RESPONSE_CACHE_ENABLED=true.
+
+The cache is best-effort: read and write errors are treated as misses and never
+fail the calling node.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+import aiofiles
+
+from backend.config import get_settings
+
+
+def make_key(*parts: str) -> str:
+    settings = get_settings()
+    digest = hashlib.sha256()
+    for part in (settings.llm_provider, settings.llm_model, *parts):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _cache_dir() -> Path:
+    return Path(get_settings().data_dir) / "llm_cache"
+
+
+def _entry_path(key: str) -> Path:
+    return _cache_dir() / f"{key}.json"
+
+
+async def get(key: str) -> str | None:
+    settings = get_settings()
+    if not settings.response_cache_enabled:
+        return None
+    path = _entry_path(key)
+    try:
+        if time.time() - path.stat().st_mtime > settings.response_cache_ttl_seconds:
+            path.unlink(missing_ok=True)
+            return None
+        async with aiofiles.open(path, encoding="utf-8") as f:
+            return json.loads(await f.read())["response"]
+    except Exception:
+        return None
+
+
+async def put(key: str, response: str) -> None:
+    settings = get_settings()
+    if not settings.response_cache_enabled:
+        return
+    path = _entry_path(key)
+    tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so concurrent readers never see a partial entry
+        async with aiofiles.open(tmp_path, "w", encoding="utf-8") as f:
+            await f.write(json.dumps({"response": response}))
+        os.replace(tmp_path, path)
+        await asyncio.to_thread(_evict_oldest, settings.response_cache_max_entries)
+    except Exception as e:
+        tmp_path.unlink(missing_ok=True)
+        print(f"Response cache write failed: {e}", flush=True)
+
+
+def _evict_oldest(max_entries: int) -> None:
+    entries = [e for e in os.scandir(_cache_dir()) if e.name.endswith(".json")]
+    if len(entries) <= max_entries:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for entry in entries[:len(entries) - max_entries]:
+        try:
+            os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,43 @@
+from backend.agent.nodes import _extract_json_block, _strip_code_fence
+
+# (text, lang, expected body)
+FENCE_CASES = [
+    ('```json\n{"a":1}\n```', "json", '{"a":1}'),
+    ('```json{"a":1}```', "json", '{"a":1}'),
+    ('```json {"a":1}```', "json", '{"a":1}'),
+    ('Here you go:\n```json\n{"a":1}\n```\nDone.', "json", '{"a":1}'),
+    ('```\n{"a":1}\n```', "json", '{"a":1}'),
+    ("```python\nfig=1\n```", "python", "fig=1"),
+    ("```python fig=1```", "python", "fig=1"),
+    ("```python\nfig=1", "python", "fig=1"),
+    ("```py\nfig=1\n```", "python", "fig=1"),
+    ("```mermaid\nflowchart TD\nA-->B\n```", "mermaid", "flowchart TD\nA-->B"),
+    ("```flowchart TD\nA-->B\n```", "mermaid", "flowchart TD\nA-->B"),
+    ("flowchart TD\nA-->B", "mermaid", "flowchart TD\nA-->B"),
+]
+
+# (text, expected JSON string)
+JSON_CASES = [
+    ('```json{"a":1}```', '{"a":1}'),
+    ('```json {"a":1}```', '{"a":1}'),
+    ('Sure! {"a": {"b": 2}} Hope that helps.', '{"a": {"b": 2}}'),
+    ('{"a":1}', '{"a":1}'),
+]
+
+
+def main():
+    results = [(text, _strip_code_fence(text, lang), expected) for text, lang, expected in FENCE_CASES]
+    results += [(text, _extract_json_block(text), expected) for text, expected in JSON_CASES]
+
+    failed = 0
+    for text, got, expected in results:
+        ok = got == expected
+        failed += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {text!r} -> {got!r}")
+
+    if failed:
+        raise SystemExit(f"{failed} case(s) failed")
+
+
+if __name__ == "__main__":
+    main()